@@ -1,5 +1,15 @@
+from typing import Optional
+
+
 class APIError(Exception):
-    """Raised when unexpected server error."""
+    """Raised when unexpected server error.
+
+    Args:
+        status_code : The HTTP status code of the response, if the server returned one
+    """
+    def __init__(self, *args, status_code: Optional[int] = None):
+        super().__init__(*args)
+        self.status_code = status_code
 
 
 class ParametersError(Exception):
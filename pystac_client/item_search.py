@@ -1,18 +1,27 @@
-from dateutil.tz import tzutc
+from dateutil.parser import isoparse
 from dateutil.relativedelta import relativedelta
 import json
+import queue
 import re
+import threading
 from collections.abc import Iterable, Mapping
-from copy import deepcopy
-from datetime import timezone, datetime as datetime_
-from typing import Dict, Iterator, List, Optional, TYPE_CHECKING, Tuple, Union
+from copy import copy, deepcopy
+from functools import lru_cache
+from datetime import timedelta, timezone, datetime as datetime_
+from typing import Callable, Dict, Iterator, List, Optional, TYPE_CHECKING, Tuple, TypeVar, Union
 import warnings
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
 from pystac import Collection, Item, ItemCollection
 from pystac.stac_io import StacIO
 
 from pystac_client.stac_api_io import StacApiIO
 from pystac_client.conformance import ConformanceClasses
+from pystac_client.exceptions import APIError, ParametersError
 
 if TYPE_CHECKING:
     from pystac_client.client import Client
@@ -49,6 +58,8 @@ SortbyLike = Union[Sortby, str]
 Fields = List[str]
 FieldsLike = Union[Fields, str]
 
+T = TypeVar('T')
+
 
 # from https://gist.github.com/angstwad/bf22d1822c38a92ec0a9#gistcomment-2622319
 def dict_merge(dct: Dict, merge_dct: Dict, add_keys: bool = True) -> Dict:
@@ -82,6 +93,70 @@ def dict_merge(dct: Dict, merge_dct: Dict, add_keys: bool = True) -> Dict:
     return dct
 
 
+def _to_utc_isoformat(dt: datetime_) -> str:
+    dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat("T") + "Z"
+
+
+@lru_cache(maxsize=256)
+def _to_isoformat_range(component: DatetimeOrTimestamp) -> Tuple[str, Optional[str]]:
+    """Converts a single DatetimeOrTimestamp into one or two Datetimes.
+
+    This is required to expand a single value like "2017" out to the whole year. This function returns two values.
+    The first value is always a valid Datetime. The second value can be None or a Datetime. If it is None, this
+    means that the first value was an exactly specified value (e.g. a `datetime.datetime`). If the second value is
+    a Datetime, then it will be the end of the range at the resolution of the component, e.g. if the component
+    were "2017" the second value would be the last second of the last day of 2017.
+    """
+    if component is None:
+        return "..", None
+    elif isinstance(component, str):
+        if component == "..":
+            return component, None
+
+        match = DATETIME_REGEX.match(component)
+        if not match:
+            raise Exception(f"invalid datetime component: {component}")
+        elif match.group("remainder"):
+            if match.group("tz_info"):
+                return component, None
+            else:
+                return f"{component}Z", None
+        else:
+            year = int(match.group("year"))
+            optional_month = match.group("month")
+            optional_day = match.group("day")
+
+        if optional_day is not None:
+            start = datetime_(year,
+                              int(optional_month),
+                              int(optional_day),
+                              0,
+                              0,
+                              0,
+                              tzinfo=timezone.utc)
+            end = start + relativedelta(days=1, seconds=-1)
+        elif optional_month is not None:
+            start = datetime_(year, int(optional_month), 1, 0, 0, 0, tzinfo=timezone.utc)
+            end = start + relativedelta(months=1, seconds=-1)
+        else:
+            start = datetime_(year, 1, 1, 0, 0, 0, tzinfo=timezone.utc)
+            end = start + relativedelta(years=1, seconds=-1)
+        return _to_utc_isoformat(start), _to_utc_isoformat(end)
+    else:
+        return _to_utc_isoformat(component), None
+
+
+@lru_cache(maxsize=256)
+def _parse_bbox(value: str) -> BBox:
+    return tuple(map(float, value.split(',')))
+
+
+@lru_cache(maxsize=256)
+def _split_list(value: str) -> Tuple[str, ...]:
+    return tuple(value.split(','))
+
+
 class ItemSearch:
     """Represents a deferred query to a STAC search endpoint as described in the
     `STAC API - Item Search spec <https://github.com/radiantearth/stac-api-spec/tree/master/item-search>`__.
@@ -104,8 +179,8 @@ class ItemSearch:
             parameter and is instead used by the client to limit the total number of returned items*.
         limit : The maximum number of items to return *per page*. Defaults to ``None``, which falls back to the limit set
             by the service.
-        bbox: May be a list, tuple, or iterator representing a bounding box of 2D or 3D coordinates. Results will be filtered
-            to only those intersecting the bounding box.
+        bbox: May be a list, tuple, array, or iterator representing a bounding box of 2D or 3D coordinates. Results will be
+            filtered to only those intersecting the bounding box.
         datetime: Either a single datetime or datetime range used to filter results. You may express a single datetime
             using a :class:`datetime.datetime` instance, a `RFC 3339-compliant <https://tools.ietf.org/html/rfc3339>`__
             timestamp, or a simple date string (see below). Instances of :class:`datetime.datetime` may be either
@@ -140,6 +215,8 @@ class ItemSearch:
             Use `get_all_items_as_dict` to avoid errors
         max_items: The maximum number of items to get, even if there are more matched items
         method: The http method, 'GET' or 'POST'
+        prefetch: The number of pages of results to request ahead in a background thread while the current page is
+            being consumed. Defaults to 2. Set to 0 to only request each page once it is needed.
         stac_io: An instance of of StacIO for retrieving results. Normally comes from the Client that returns this ItemSearch
         client: An instance of a root Client used to set the root on resulting Items
     """
@@ -158,6 +235,7 @@ class ItemSearch:
                  fields: Optional[FieldsLike] = None,
                  max_items: Optional[int] = None,
                  method: Optional[str] = 'POST',
+                 prefetch: int = 2,
                  stac_io: Optional[StacIO] = None,
                  client: Optional["Client"] = None):
         self.url = url
@@ -177,6 +255,7 @@ class ItemSearch:
             raise Exception(f"Invalid limit of {limit}, must be between 1 and 10,000")
 
         self.method = method
+        self._prefetch = prefetch
 
         params = {
             'limit': limit,
@@ -195,21 +274,34 @@ class ItemSearch:
             params['filter-lang'] = 'cql-json'
 
         self._parameters = {k: v for k, v in params.items() if v is not None}
+        self._number_matched = None
+        self._get_parameters = None
 
     def get_parameters(self):
         if self.method == 'POST':
             return self._parameters
         elif self.method == 'GET':
-            params = deepcopy(self._parameters)
-            if 'bbox' in params:
-                params['bbox'] = ','.join(map(str, params['bbox']))
-            if 'ids' in params:
-                params['ids'] = ','.join(params['ids'])
-            if 'collections' in params:
-                params['collections'] = ','.join(params['collections'])
-            if 'intersects' in params:
-                params['intersects'] = json.dumps(params['intersects'])
-            return params
+            # serializing the parameters for the query string is only done once per search
+            if self._get_parameters is None:
+                params = self._parameters.copy()
+                if 'bbox' in params:
+                    params['bbox'] = ','.join(map(str, params['bbox']))
+                if 'ids' in params:
+                    params['ids'] = ','.join(params['ids'])
+                if 'collections' in params:
+                    params['collections'] = ','.join(params['collections'])
+                if 'intersects' in params:
+                    params['intersects'] = json.dumps(params['intersects'])
+                if 'query' in params:
+                    params['query'] = json.dumps(params['query'])
+                if 'filter' in params:
+                    params['filter'] = json.dumps(params['filter'])
+                if 'sortby' in params:
+                    params['sortby'] = ','.join(params['sortby'])
+                if 'fields' in params:
+                    params['fields'] = ','.join(params['fields'])
+                self._get_parameters = params
+            return self._get_parameters.copy()
         else:
             raise Exception(f"Unsupported method {self.method}")
 
@@ -249,75 +341,29 @@ class ItemSearch:
         if value is None:
             return None
 
+        # float subclasses (e.g. numpy.float64) still need converting, orjson cannot serialize them
+        if isinstance(value, tuple) and all(type(x) is float for x in value):
+            return value
         if isinstance(value, str):
-            bbox = tuple(map(float, value.split(',')))
-        else:
-            bbox = tuple(map(float, value))
+            return _parse_bbox(value)
+        if hasattr(value, 'tolist'):
+            # arrays (e.g. numpy.ndarray) convert all of their values to Python numbers in a single call
+            value = value.tolist()
 
-        return bbox
+        return tuple(map(float, value))
 
     @staticmethod
     def _format_datetime(value: Optional[DatetimeLike]) -> Optional[Datetime]:
-        def _to_utc_isoformat(dt):
-            dt = dt.astimezone(timezone.utc)
-            dt = dt.replace(tzinfo=None)
-            return dt.isoformat("T") + "Z"
-
-        def _to_isoformat_range(component: DatetimeOrTimestamp):
-            """Converts a single DatetimeOrTimestamp into one or two Datetimes.
-
-            This is required to expand a single value like "2017" out to the whole year. This function returns two values.
-            The first value is always a valid Datetime. The second value can be None or a Datetime. If it is None, this
-            means that the first value was an exactly specified value (e.g. a `datetime.datetime`). If the second value is
-            a Datetime, then it will be the end of the range at the resolution of the component, e.g. if the component
-            were "2017" the second value would be the last second of the last day of 2017.
-            """
-            if component is None:
-                return "..", None
-            elif isinstance(component, str):
-                if component == "..":
-                    return component, None
-
-                match = DATETIME_REGEX.match(component)
-                if not match:
-                    raise Exception(f"invalid datetime component: {component}")
-                elif match.group("remainder"):
-                    if match.group("tz_info"):
-                        return component, None
-                    else:
-                        return f"{component}Z", None
-                else:
-                    year = int(match.group("year"))
-                    optional_month = match.group("month")
-                    optional_day = match.group("day")
-
-                if optional_day is not None:
-                    start = datetime_(year,
-                                      int(optional_month),
-                                      int(optional_day),
-                                      0,
-                                      0,
-                                      0,
-                                      tzinfo=tzutc())
-                    end = start + relativedelta(days=1, seconds=-1)
-                elif optional_month is not None:
-                    start = datetime_(year, int(optional_month), 1, 0, 0, 0, tzinfo=tzutc())
-                    end = start + relativedelta(months=1, seconds=-1)
-                else:
-                    start = datetime_(year, 1, 1, 0, 0, 0, tzinfo=tzutc())
-                    end = start + relativedelta(years=1, seconds=-1)
-                return _to_utc_isoformat(start), _to_utc_isoformat(end)
-            else:
-                return _to_utc_isoformat(component), None
-
         if value is None:
             return None
-        elif isinstance(value, datetime_):
-            return _to_utc_isoformat(value)
         elif isinstance(value, str):
             components = value.split("/")
+        elif isinstance(value, datetime_):
+            return _to_utc_isoformat(value)
+        elif isinstance(value, (list, tuple)):
+            components = value
         else:
-            components = list(value)
+            components = tuple(value)
 
         if not components:
             return None
@@ -337,22 +383,23 @@ class ItemSearch:
 
     @staticmethod
     def _format_collections(value: Optional[CollectionsLike]) -> Optional[Collections]:
-        def _format(c):
-            if isinstance(c, str):
-                return c
-            if isinstance(c, Iterable):
-                return tuple(map(_format, c))
-
-            return c.id
+        def _flatten(values):
+            for c in values:
+                if isinstance(c, str):
+                    yield c
+                elif isinstance(c, Iterable):
+                    yield from _flatten(c)
+                else:
+                    yield c.id
 
         if value is None:
             return None
         if isinstance(value, str):
-            return tuple(map(_format, value.split(',')))
+            return _split_list(value)
         if isinstance(value, Collection):
-            return _format(value),
+            return value.id,
 
-        return _format(value)
+        return tuple(_flatten(value))
 
     @staticmethod
     def _format_ids(value: Optional[IDsLike]) -> Optional[IDs]:
@@ -360,7 +407,7 @@ class ItemSearch:
             return None
 
         if isinstance(value, str):
-            return tuple(value.split(','))
+            return _split_list(value)
 
         return tuple(value)
 
@@ -371,7 +418,7 @@ class ItemSearch:
         self._stac_io.assert_conforms_to(ConformanceClasses.SORT)
 
         if isinstance(value, str):
-            return tuple(value.split(','))
+            return _split_list(value)
 
         return tuple(value)
 
@@ -382,7 +429,7 @@ class ItemSearch:
         self._stac_io.assert_conforms_to(ConformanceClasses.FIELDS)
 
         if isinstance(value, str):
-            return tuple(value.split(','))
+            return _split_list(value)
 
         return tuple(value)
 
@@ -391,55 +438,250 @@ class ItemSearch:
         if value is None:
             return None
         if isinstance(value, str):
-            return json.loads(value)
-        return deepcopy(getattr(value, '__geo_interface__', value))
+            return orjson.loads(value) if orjson is not None else json.loads(value)
+        geometry = getattr(value, '__geo_interface__', value)
+        if orjson is not None:
+            # round-tripping through orjson copies plain GeoJSON much faster than deepcopy
+            try:
+                return orjson.loads(orjson.dumps(geometry))
+            except TypeError:
+                pass
+        return deepcopy(geometry)
 
     def matched(self) -> int:
         """Return number matched for search
 
         Returns the value from the `numberMatched` or `context.matched` field. Not all APIs
-        will support counts in which case a warning will be issued
+        will support counts in which case a warning will be issued. If results have already been fetched, the value
+        from the first page is returned without making another request.
 
         Returns:
             int: Total count of matched items. If counts are not supported `None` is returned.
         """
-        params = {**self.get_parameters(), "limit": 1}
-        resp = self._stac_io.read_json(self.url, method=self.method, parameters=params)
-        found = None
-        if 'context' in resp:
-            found = resp['context']['matched']
-        elif 'numberMatched' in resp:
-            found = resp['numberMatched']
+        if self._number_matched is None:
+            self._number_matched = self._fetch_matched()
+        return self._number_matched
+
+    def _fetch_matched(self) -> Optional[int]:
+        def read_matched():
+            params = {**self.get_parameters(), "limit": 1}
+            return self._stac_io.read_json(self.url, method=self.method, parameters=params)
+
+        resp = self._with_get_fallback(read_matched)
+        found = self._get_matched(resp)
         if found is None:
             warnings.warn("numberMatched or context.matched not in response")
         return found
 
+    @staticmethod
+    def _get_matched(page: Dict) -> Optional[int]:
+        matched = page.get('context', {}).get('matched')
+        if matched is None:
+            matched = page.get('numberMatched')
+        return matched
+
+    def _get_pages(self) -> Iterator[Dict]:
+        def read_first_page():
+            pages = self._stac_io.get_pages(self.url,
+                                            self.method,
+                                            self.get_parameters(),
+                                            prefetch=self._prefetch,
+                                            max_items=self._max_items)
+            return next(pages), pages
+
+        page, pages = self._with_get_fallback(read_first_page)
+        if self._number_matched is None:
+            self._number_matched = self._get_matched(page)
+        yield page
+        yield from pages
+
+    def _with_get_fallback(self, request: Callable[[], T]) -> T:
+        """Calls ``request`` and, if a ``"POST"`` request receives a ``405`` status for the response, switches this
+        search to ``"GET"`` and calls it again."""
+        try:
+            return request()
+        except APIError as err:
+            if self.method != 'POST' or err.status_code != 405:
+                raise
+            self.method = 'GET'
+            return request()
+
     def get_item_collections(self) -> Iterator[ItemCollection]:
         """Iterator that yields ItemCollection objects.  Each ItemCollection is a page of results
-        from the search.
+        from the search. The next pages are requested in the background while the current page is being consumed.
 
         Yields:
             Iterable[Item] : pystac_client.ItemCollection
         """
-        for page in self._stac_io.get_pages(self.url, self.method, self.get_parameters()):
+        for page in self._get_pages():
             yield ItemCollection.from_dict(page, preserve_dict=False, root=self.client)
 
     def get_items(self) -> Iterator[Item]:
-        """Iterator that yields :class:`pystac.Item` instances for each item matching the given search parameters. Calls
-        :meth:`ItemSearch.item_collections()` internally and yields from
-        :attr:`ItemCollection.features <pystac_client.ItemCollection.features>` for each page of results.
+        """Iterator that yields :class:`pystac.Item` instances for each item matching the given search parameters.
+        Items are created one at a time from the features of each page of results, rather than building an
+        :class:`~pystac.ItemCollection` for the whole page as :meth:`ItemSearch.get_item_collections` does.
 
         Return:
             Iterable[Item] : Iterate through resulting Items
         """
+        for feature in self.get_items_as_dicts():
+            yield Item.from_dict(feature, preserve_dict=False, root=self.client)
+
+    def get_items_as_dicts(self) -> Iterator[Dict]:
+        """Iterator that yields a dictionary for each item matching the given search parameters, as returned by the
+        API. This skips creating :class:`pystac.Item` instances, which is faster than :meth:`ItemSearch.get_items`
+        when only the raw dictionaries are needed.
+
+        Return:
+            Iterable[Dict] : Iterate through resulting Items as dictionaries
+        """
         nitems = 0
-        for item_collection in self.get_item_collections():
-            for item in item_collection:
-                yield item
+        for page in self._get_pages():
+            for feature in page.get('features', []):
+                yield feature
                 nitems += 1
                 if self._max_items and nitems >= self._max_items:
                     return
 
+    def split(self, num_requests: int) -> List["ItemSearch"]:
+        """Splits this search into ``num_requests`` searches over consecutive, non-overlapping sub-ranges of its
+        ``datetime`` range. All other parameters are shared with this search. The returned searches are independent
+        of each other and can be run concurrently, see :meth:`ItemSearch.get_items_parallel`.
+
+        If the range is open-ended at the end (e.g. ``2020-01-01T00:00:00Z/..``), the current time is used to compute
+        the sub-ranges and the last search remains open-ended.
+
+        Args:
+            num_requests: The number of searches to split this search into
+
+        Return:
+            List[ItemSearch] : Searches covering the ``datetime`` range of this search
+
+        Raises:
+            ParametersError: If ``num_requests`` is less than 1, or if this search does not have a ``datetime``
+                range with a defined start
+        """
+        if num_requests < 1:
+            raise ParametersError(f"Invalid number of requests {num_requests}, must be at least 1")
+
+        components = self._parameters.get('datetime', '').split('/')
+        if len(components) != 2:
+            raise ParametersError("Only searches with a datetime range can be split")
+        start, end = components
+        if start == '..':
+            raise ParametersError(
+                "Searches with an open-ended datetime range start cannot be split")
+
+        start_dt = isoparse(start)
+        end_dt = datetime_.now(timezone.utc) if end == '..' else isoparse(end)
+        step = (end_dt - start_dt) / num_requests
+        if step <= timedelta(0):
+            num_requests = 1
+
+        starts = [start] + [start_dt + step * i for i in range(1, num_requests)]
+        ends = [dt - timedelta(microseconds=1) for dt in starts[1:]] + [end]
+
+        searches = []
+        for split_start, split_end in zip(starts, ends):
+            search = copy(self)
+            search._parameters = {
+                **self._parameters, 'datetime': self._format_datetime((split_start, split_end))
+            }
+            search._number_matched = None
+            search._get_parameters = None
+            searches.append(search)
+        return searches
+
+    def get_items_parallel(self, workers: int = 8) -> Iterator[Item]:
+        """Iterator that yields :class:`pystac.Item` instances for each item matching the given search parameters,
+        fetching results concurrently. The search is split into ``workers`` searches over sub-ranges of its
+        ``datetime`` range using :meth:`ItemSearch.split`, and each of them is paged through in its own thread.
+
+        Items are yielded as soon as any of the searches returns them, so the order is not defined and may differ
+        from the order returned by :meth:`ItemSearch.get_items`. ``max_items`` applies to the total across all of
+        the searches, which stop requesting pages once it has been reached or the iterator is closed.
+
+        Args:
+            workers: The number of concurrent searches
+
+        Return:
+            Iterable[Item] : Iterate through resulting Items
+        """
+        searches = self.split(workers)
+        # every worker puts at most one more result after ``stop`` is set, so draining the queue once is enough to
+        # make sure none of them stay blocked as long as the queue can hold one result per worker
+        results = queue.Queue(maxsize=2 * len(searches))
+        stop = threading.Event()
+        # ``remaining`` items may still be requested and ``reserved`` are being fetched by workers, which wait for
+        # the reserved items instead of stopping as long as those could still turn out not to exist
+        condition = threading.Condition()
+        remaining = self._max_items
+        reserved = 0
+        done = object()
+
+        def reserve() -> bool:
+            nonlocal remaining, reserved
+            with condition:
+                while remaining == 0 and reserved and not stop.is_set():
+                    condition.wait()
+                if stop.is_set() or remaining == 0:
+                    return False
+                if remaining is not None:
+                    remaining -= 1
+                reserved += 1
+                return True
+
+        def release(found: bool) -> None:
+            nonlocal remaining, reserved
+            with condition:
+                reserved -= 1
+                if not found and remaining is not None:
+                    remaining += 1
+                condition.notify_all()
+
+        def put(result) -> bool:
+            if stop.is_set():
+                return False
+            results.put(result)
+            return True
+
+        def work(search: ItemSearch) -> None:
+            items = search.get_items()
+            try:
+                while reserve():
+                    item = None
+                    try:
+                        item = next(items, None)
+                    finally:
+                        release(item is not None)
+                    if item is None or not put(item):
+                        break
+            except Exception as err:
+                put(err)
+            finally:
+                items.close()
+                put(done)
+
+        for search in searches:
+            threading.Thread(target=work, args=(search, ), daemon=True).start()
+
+        try:
+            running = len(searches)
+            while running:
+                result = results.get()
+                if result is done:
+                    running -= 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            with condition:
+                stop.set()
+                condition.notify_all()
+            while not results.empty():
+                results.get_nowait()
+
     def get_all_items_as_dict(self) -> Dict:
         """Convenience method that gets all items from all pages, up to self._max_items,
          and returns an array of dictionaries
@@ -447,13 +689,7 @@ class ItemSearch:
         Return:
             Dict : A GeoJSON FeatureCollection
         """
-        features = []
-        for page in self._stac_io.get_pages(self.url, self.method, self.get_parameters()):
-            for feature in page['features']:
-                features.append(feature)
-                if self._max_items and len(features) >= self._max_items:
-                    return {"type": "FeatureCollection", "features": features}
-        return {"type": "FeatureCollection", "features": features}
+        return {"type": "FeatureCollection", "features": list(self.get_items_as_dicts())}
 
     def get_all_items(self) -> ItemCollection:
         """Convenience method that builds an :class:`ItemCollection` from all items matching the given search parameters.
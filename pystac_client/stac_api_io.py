@@ -1,6 +1,7 @@
-from copy import deepcopy
 import json
 import logging
+import queue
+import threading
 from typing import (
     Any,
     Dict,
@@ -13,6 +14,13 @@ from typing import (
 from urllib.parse import urlparse
 import re
 from requests import Request, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
 
 import pystac
 from pystac.link import Link
@@ -34,6 +42,59 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_POOL_MAXSIZE = 32
+
+
+def _create_adapter(pool_maxsize: int = DEFAULT_POOL_MAXSIZE) -> HTTPAdapter:
+    """Creates an adapter with connection pools of the given size that retries failed connections and responses
+    with a 502, 503 or 504 status for any method, since searches may be sent with POST. Once the retries are used up
+    the last response is returned, so its status ends up in the :class:`~pystac_client.exceptions.APIError`."""
+    return HTTPAdapter(pool_connections=pool_maxsize,
+                       pool_maxsize=pool_maxsize,
+                       max_retries=Retry(total=3,
+                                         backoff_factor=0.3,
+                                         status_forcelist=[502, 503, 504],
+                                         allowed_methods=None,
+                                         raise_on_status=False))
+
+
+def _create_session(adapter: HTTPAdapter, cache: bool = False) -> Session:
+    """Creates a Session that sends all requests through ``adapter``. If ``cache`` is ``True`` responses are cached
+    with ``requests-cache``."""
+    if cache:
+        try:
+            from requests_cache import CachedSession
+        except ImportError:
+            raise ImportError("requests-cache is required to cache responses, "
+                              "install it with `pip install pystac-client[cache]`")
+        # searches are read-only, so POST responses can be cached too
+        session = CachedSession('pystac_client_cache',
+                                backend='sqlite',
+                                cache_control=True,
+                                expire_after=3600,
+                                allowable_methods=('GET', 'HEAD', 'POST'))
+    else:
+        session = Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# each StacApiIO gets its own Session, so that changes to its headers, auth or cookies stay with that instance, but
+# by default they all send requests through this adapter to reuse its connections across searches
+_DEFAULT_ADAPTER = _create_adapter()
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Serializes a request body to compact UTF-8 JSON, using ``orjson`` if it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # orjson rejects types the standard library accepts, e.g. float subclasses such as numpy.float64
+            pass
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
 
 class StacApiIO(DefaultStacIO):
     def __init__(
@@ -41,6 +102,9 @@ class StacApiIO(DefaultStacIO):
         headers: Optional[Dict] = None,
         conformance: Optional[List[str]] = None,
         parameters: Optional[Dict] = None,
+        pool_maxsize: Optional[int] = None,
+        session: Optional[Session] = None,
+        cache: bool = False,
     ):
         """Initialize class for API IO
 
@@ -49,14 +113,28 @@ class StacApiIO(DefaultStacIO):
             conformance : Optional list of `Conformance Classes
                 <https://github.com/radiantearth/stac-api-spec/blob/master/overview.md#conformance-classes>`__.
             parameters: Optional dictionary of query string parameters to include in all requests.
+            pool_maxsize: Optional maximum number of connections to keep open to a single host, for reuse across
+                requests and threads. Defaults to 32. Ignored if ``session`` is given.
+            session: Optional :class:`requests.Session` to use for all requests. By default a new Session is created
+                for each instance. Unless ``pool_maxsize`` is given, these Sessions share their connection pools, so
+                that connections are reused across searches. ``headers`` and ``parameters`` are added to each request
+                and do not modify the Session.
+            cache: If ``True``, responses are cached for an hour in a ``pystac_client_cache.sqlite`` file in the current
+                directory, respecting any ``Cache-Control`` and ``ETag`` headers from the server. Requires the
+                ``requests-cache`` package. For other cache settings pass a ``requests_cache.CachedSession`` as
+                ``session``. Ignored if ``session`` is given.
 
         Return:
             StacApiIO : StacApiIO instance
         """
         # TODO - this should super() to parent class
-        self.session = Session()
-        self.session.headers.update(headers or {})
-        self.session.params.update(parameters or {})
+        if session is not None:
+            self.session = session
+        else:
+            adapter = _DEFAULT_ADAPTER if pool_maxsize is None else _create_adapter(pool_maxsize)
+            self.session = _create_session(adapter, cache=cache)
+        self.headers = headers or {}
+        self.parameters = parameters or {}
 
         self._conformance = conformance
 
@@ -80,24 +158,26 @@ class StacApiIO(DefaultStacIO):
                     href_contents = f.read()
                 return href_contents
         elif isinstance(source, Link):
-            link = source.to_dict()
-            href = link['href']
-            # get headers and body from Link and add to request from simple stac resolver
-            merge = bool(link.get('merge', False))
-
-            # If the link object includes a "method" property, use that. If not fall back to 'GET'.
-            method = link.get('method', 'GET')
-            # If the link object includes a "headers" property, use that and respect the "merge" property.
-            headers = link.get('headers', None)
-
-            # If "POST" use the body object that and respect the "merge" property.
-            link_body = link.get('body', {})
-            if method == 'POST':
-                parameters = {**parameters, **link_body} if merge else link_body
-            else:
-                # parameters are already in the link href
-                parameters = {}
-            return self.request(href, *args, method=method, headers=headers, parameters=parameters)
+            return self._request_link(source.to_dict(), parameters)
+
+    def _request_link(self, link: Dict, parameters: Dict) -> str:
+        href = link['href']
+        # get headers and body from Link and add to request from simple stac resolver
+        merge = bool(link.get('merge', False))
+
+        # If the link object includes a "method" property, use that. If not fall back to 'GET'.
+        method = link.get('method', 'GET')
+        # If the link object includes a "headers" property, use that and respect the "merge" property.
+        headers = link.get('headers', None)
+
+        # If "POST" use the body object that and respect the "merge" property.
+        link_body = link.get('body', {})
+        if method == 'POST':
+            parameters = {**parameters, **link_body} if merge else link_body
+        else:
+            # parameters are already in the link href
+            parameters = {}
+        return self.request(href, method=method, headers=headers, parameters=parameters)
 
     def request(self,
                 href: str,
@@ -118,23 +198,34 @@ class StacApiIO(DefaultStacIO):
         Return:
             str: The decoded response from the endpoint
         """
-        if method == 'POST':
-            request = Request(method=method, url=href, headers=headers, json=parameters)
-        else:
-            params = deepcopy(parameters)
-            if 'intersects' in params:
-                params['intersects'] = json.dumps(params['intersects'])
-            request = Request(method=method, url=href, headers=headers, params=params)
+        headers = {**self.headers, **(headers or {})}
         try:
-            prepped = self.session.prepare_request(request)
-            msg = f"{prepped.method} {prepped.url} Headers: {prepped.headers}"
             if method == 'POST':
-                msg += f" Payload: {json.dumps(request.json)}"
-            logger.debug(msg)
+                request = Request(method=method,
+                                  url=href,
+                                  headers={
+                                      **headers, 'Content-Type': 'application/json'
+                                  },
+                                  params=self.parameters,
+                                  data=_json_dumps(parameters))
+            else:
+                # only top-level values are replaced, so a shallow copy leaves the caller's parameters untouched
+                params = {**self.parameters, **parameters}
+                if not isinstance(params.get('intersects', ''), str):
+                    params['intersects'] = json.dumps(params['intersects'])
+                request = Request(method=method, url=href, headers=headers, params=params)
+            prepped = self.session.prepare_request(request)
+            if logger.isEnabledFor(logging.DEBUG):
+                msg = f"{prepped.method} {prepped.url} Headers: {prepped.headers}"
+                if method == 'POST':
+                    msg += f" Payload: {request.data.decode('utf-8')}"
+                logger.debug(msg)
             resp = self.session.send(prepped)
             if resp.status_code != 200:
-                raise APIError(resp.text)
+                raise APIError(resp.text, status_code=resp.status_code)
             return resp.content.decode("utf-8")
+        except APIError:
+            raise
         except Exception as err:
             raise APIError(str(err))
 
@@ -200,24 +291,92 @@ class StacApiIO(DefaultStacIO):
 
         raise ValueError(f"Unknown STAC object type {info.object_type}")
 
-    def get_pages(self, url, method='GET', parameters={}) -> Iterator[Dict]:
+    def get_pages(self,
+                  url,
+                  method='GET',
+                  parameters={},
+                  prefetch=0,
+                  max_items: Optional[int] = None) -> Iterator[Dict]:
         """Iterator that yields dictionaries for each page at a STAC paging endpoint, e.g., /collections, /search
 
+        Args:
+            url : The URL of the first page
+            method : The http method to use for the first page, 'GET' or 'POST'. Defaults to 'GET'.
+            parameters : Parameters to send with the requests. Defaults to {}.
+            prefetch : The number of pages to request ahead from a background thread while the current page is being
+                consumed, so that network latency overlaps with processing of the results. At most this many pages
+                are read but not yet yielded at any time. Defaults to 0, which requests each page only after the
+                previous one has been consumed.
+            max_items : Stop requesting pages once the pages so far contain at least this many ``features``.
+                Defaults to None, which follows "next" links until there are none left.
+
         Return:
             Dict : JSON content from a single page
         """
-        page = self.read_json(url, method=method, parameters=parameters)
-        yield page
+        if prefetch:
+            yield from self._prefetch_pages(url, method, parameters, prefetch, max_items)
+            return
 
-        next_link = next((link for link in page.get('links', []) if link['rel'] == 'next'), None)
-        while next_link:
-            link = Link.from_dict(next_link)
-            page = self.read_json(link, parameters=parameters)
+        num_items = 0
+        page = self.read_json(url, method=method, parameters=parameters)
+        while page is not None:
             yield page
+            num_items += len(page.get('features', []))
+            if max_items is not None and num_items >= max_items:
+                return
+            page = self._read_next_page(self._get_next_link(page), parameters)
+
+    def _prefetch_pages(self, url, method, parameters, prefetch, max_items) -> Iterator[Dict]:
+        pages = queue.Queue()
+        # each page is requested only once there is room for it, so at most ``prefetch`` pages have been read but
+        # not yet consumed
+        room = threading.Semaphore(prefetch)
+        stop = threading.Event()
+        done = object()
+
+        def produce():
+            num_items = 0
+            try:
+                room.acquire()
+                page = self.read_json(url, method=method, parameters=parameters)
+                while page is not None:
+                    pages.put(page)
+                    num_items += len(page.get('features', []))
+                    if max_items is not None and num_items >= max_items:
+                        break
+                    room.acquire()
+                    if stop.is_set():
+                        return
+                    page = self._read_next_page(self._get_next_link(page), parameters)
+            except Exception as err:
+                pages.put(err)
+            else:
+                pages.put(done)
 
-            # get the next link and make the next request
-            next_link = next((link for link in page.get('links', []) if link['rel'] == 'next'),
-                             None)
+        threading.Thread(target=produce, daemon=True).start()
+        try:
+            while True:
+                page = pages.get()
+                room.release()
+                if page is done:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            stop.set()
+            # unblock the producer if it is waiting for room for the next page
+            room.release()
+
+    @staticmethod
+    def _get_next_link(page: Dict) -> Optional[Dict]:
+        return next((link for link in page.get('links', []) if link['rel'] == 'next'), None)
+
+    def _read_next_page(self, next_link: Optional[Dict], parameters: Dict) -> Optional[Dict]:
+        if next_link is None:
+            return None
+        # request the link dict directly rather than round-tripping it through a pystac Link
+        return self.json_loads(self._request_link(next_link, parameters))
 
     def assert_conforms_to(self, conformance_class: ConformanceClasses) -> None:
         """Raises a :exc:`NotImplementedError` if the API does not publish the given conformance class. This method
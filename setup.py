@@ -30,10 +30,13 @@ setup(
     python_requires=">=3.7",
     install_requires=[
         "requests>=2.25",
+        "urllib3>=1.26",
         "pystac~=1.2.0"
     ],
     extras_require={
-        "validation": ["jsonschema==3.2.0"]
+        "validation": ["jsonschema==3.2.0"],
+        "orjson": ["orjson>=3.5"],
+        "cache": ["requests-cache>=0.7"]
     },
     license="Apache Software License 2.0",
     zip_safe=False,
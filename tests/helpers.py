@@ -1,4 +1,6 @@
 import json
+import threading
+import time
 from pathlib import Path
 
 TEST_DATA = Path(__file__).parent / 'data'
@@ -17,3 +19,25 @@ def read_data_file(file_name: str, mode='r', parse_json=False):
             return json.load(src)
         else:
             return src.read()
+
+
+def make_item(item_id: str) -> dict:
+    """Returns a minimal STAC Item dictionary with the given ID."""
+    return {
+        "type": "Feature",
+        "stac_version": "1.0.0",
+        "id": item_id,
+        "geometry": None,
+        "properties": {
+            "datetime": "2020-01-01T00:00:00Z"
+        },
+        "links": [],
+        "assets": {}
+    }
+
+
+def join_new_threads(threads: set, timeout: float = 5):
+    """Waits until the threads started since ``threads`` was taken from :func:`threading.enumerate` have exited."""
+    deadline = time.monotonic() + timeout
+    while set(threading.enumerate()) - threads and time.monotonic() < deadline:
+        time.sleep(0.01)
@@ -1,14 +1,20 @@
+from array import array
 import json
+import threading
+import time
+from copy import deepcopy
 from datetime import datetime, timedelta
+from urllib.parse import parse_qs, urlsplit
 
 import pystac
 import pytest
 import requests
 from dateutil.tz import gettz, tzutc
 from pystac_client import Client
-from pystac_client.item_search import ItemSearch
+from pystac_client.exceptions import APIError, ParametersError
+from pystac_client.item_search import ItemSearch, _parse_bbox, _split_list, _to_isoformat_range
 
-from .helpers import STAC_URLS, read_data_file
+from .helpers import STAC_URLS, join_new_threads, make_item, read_data_file
 
 SEARCH_URL = f"{STAC_URLS['PLANETARY-COMPUTER']}/search"
 INTERSECTS_EXAMPLE = {
@@ -78,6 +84,41 @@ class TestItemSearchParams:
         search = ItemSearch(url=SEARCH_URL, bbox=bboxer())
         assert search._parameters['bbox'] == (-104.5, 44.0, -104.0, 45.0)
 
+    def test_array_bbox(self):
+        # Array input
+        search = ItemSearch(url=SEARCH_URL, bbox=array('d', [-104.5, 44.0, -104.0, 45.0]))
+        assert search._parameters['bbox'] == (-104.5, 44.0, -104.0, 45.0)
+
+    def test_float_subclass_bbox(self):
+        # Float subclasses (e.g. numpy.float64) are converted to float
+        class Float(float):
+            pass
+
+        search = ItemSearch(url=SEARCH_URL,
+                            bbox=tuple(Float(x) for x in (-104.5, 44.0, -104.0, 45.0)))
+        assert search._parameters['bbox'] == (-104.5, 44.0, -104.0, 45.0)
+        assert all(type(x) is float for x in search._parameters['bbox'])
+
+    def test_cached_string_parameters(self):
+        # Repeated string parameters are parsed once and give the same result
+        _parse_bbox.cache_clear()
+        _split_list.cache_clear()
+        _to_isoformat_range.cache_clear()
+        for _ in range(2):
+            search = ItemSearch(url=SEARCH_URL,
+                                bbox='-104.5,44.0,-104.0,45.0',
+                                ids='id1,id2',
+                                collections='naip,landsat8_l1tp',
+                                datetime='2020-06')
+            assert search._parameters['bbox'] == (-104.5, 44.0, -104.0, 45.0)
+            assert search._parameters['ids'] == ('id1', 'id2')
+            assert search._parameters['collections'] == ('naip', 'landsat8_l1tp')
+            assert search._parameters['datetime'] == "2020-06-01T00:00:00Z/2020-06-30T23:59:59Z"
+
+        assert _parse_bbox.cache_info().hits == 1
+        assert _split_list.cache_info().hits == 2
+        assert _to_isoformat_range.cache_info().hits == 1
+
     def test_single_string_datetime(self):
         # Single timestamp input
         search = ItemSearch(url=SEARCH_URL, datetime='2020-02-01T00:00:00Z')
@@ -94,6 +135,14 @@ class TestItemSearchParams:
                             datetime=['2020-02-01T00:00:00Z', '2020-02-02T00:00:00Z'])
         assert search._parameters['datetime'] == '2020-02-01T00:00:00Z/2020-02-02T00:00:00Z'
 
+    def test_generator_datetime(self):
+        # Generator input
+        def datetimer():
+            yield from ['2020-02-01T00:00:00Z', '2020-02-02T00:00:00Z']
+
+        search = ItemSearch(url=SEARCH_URL, datetime=datetimer())
+        assert search._parameters['datetime'] == '2020-02-01T00:00:00Z/2020-02-02T00:00:00Z'
+
     def test_open_range_string_datetime(self):
         # Open timestamp range input
         search = ItemSearch(url=SEARCH_URL, datetime='2020-02-01T00:00:00Z/..')
@@ -121,6 +170,19 @@ class TestItemSearchParams:
         search = ItemSearch(url=SEARCH_URL, datetime=(start, None))
         assert search._parameters['datetime'] == '2020-02-01T00:00:00Z/..'
 
+    def test_datetime_object_formatting(self):
+        # Whole seconds, fractional seconds and years before 1000 are formatted as RFC 3339
+        search = ItemSearch(url=SEARCH_URL,
+                            datetime=datetime(2020, 2, 1, 12, 30, 15, tzinfo=tzutc()))
+        assert search._parameters['datetime'] == '2020-02-01T12:30:15Z'
+
+        search = ItemSearch(url=SEARCH_URL,
+                            datetime=datetime(2020, 2, 1, 12, 30, 15, 500, tzinfo=tzutc()))
+        assert search._parameters['datetime'] == '2020-02-01T12:30:15.000500Z'
+
+        search = ItemSearch(url=SEARCH_URL, datetime=datetime(500, 1, 1, tzinfo=tzutc()))
+        assert search._parameters['datetime'] == '0500-01-01T00:00:00Z'
+
     def test_localized_datetime_converted_to_utc(self):
         # Localized datetime input (should be converted to UTC)
         start_localized = datetime(2020, 2, 1, 0, 0, 0, tzinfo=gettz('US/Eastern'))
@@ -218,6 +280,13 @@ class TestItemSearchParams:
         search = ItemSearch(url=SEARCH_URL, collections=collectioner())
         assert search._parameters['collections'] == ('naip', 'landsat8_l1tp')
 
+    def test_nested_collections(self):
+        # Nested iterables of ID strings and Collection instances are flattened
+        collection = pystac.Collection.from_dict(
+            read_data_file('planetary-computer-aster-l1t-collection.json', parse_json=True))
+        search = ItemSearch(url=SEARCH_URL, collections=[['naip', collection], ('landsat8_l1tp', )])
+        assert search._parameters['collections'] == ('naip', 'aster-l1t', 'landsat8_l1tp')
+
     def test_single_id_string(self):
         # Single ID
         search = ItemSearch(url=SEARCH_URL, ids='m_3510836_se_12_060_20180508_20190331')
@@ -255,6 +324,13 @@ class TestItemSearchParams:
         search = ItemSearch(url=SEARCH_URL, intersects=INTERSECTS_EXAMPLE)
         assert search._parameters['intersects'] == INTERSECTS_EXAMPLE
 
+    def test_intersects_copy(self):
+        # Changes to the input geometry do not affect the search
+        intersects = deepcopy(INTERSECTS_EXAMPLE)
+        search = ItemSearch(url=SEARCH_URL, intersects=intersects)
+        intersects['coordinates'][0][0][0] = 0
+        assert search._parameters['intersects'] == INTERSECTS_EXAMPLE
+
     def test_intersects_json_string(self):
         # JSON string input
         search = ItemSearch(url=SEARCH_URL, intersects=json.dumps(INTERSECTS_EXAMPLE))
@@ -297,6 +373,25 @@ class TestItemSearch:
         assert all(key in params for key in params_in)
         assert all(isinstance(params[key], str) for key in params_in)
 
+        # Serializing for GET does not modify the stored parameters
+        assert search._parameters['bbox'] == (-72, 41, -71, 42)
+        assert search._parameters['intersects'] == INTERSECTS_EXAMPLE
+
+    def test_get_parameters_cached(self):
+        search = ItemSearch(url=SEARCH_URL,
+                            method='GET',
+                            collections=['naip', 'landsat8_l1tp'],
+                            datetime='2020-01-01T00:00:00Z/2020-01-03T00:00:00Z')
+        params = search.get_parameters()
+        params['collections'] = 'other'
+        assert search.get_parameters()['collections'] == 'naip,landsat8_l1tp'
+
+        # Split searches do not reuse the parameters of the original search
+        first, second = search.split(2)
+        assert first.get_parameters()['datetime'] == (
+            '2020-01-01T00:00:00Z/2020-01-01T23:59:59.999999Z')
+        assert second.get_parameters()['datetime'] == '2020-01-02T00:00:00Z/2020-01-03T00:00:00Z'
+
     @pytest.mark.vcr
     def test_results(self):
         search = ItemSearch(
@@ -389,6 +484,299 @@ class TestItemSearch:
         item_collection = search.get_all_items()
         assert len(item_collection.items) == 20
 
+    def test_split(self):
+        search = ItemSearch(url=SEARCH_URL,
+                            datetime='2020-01-01T00:00:00Z/2020-01-05T00:00:00Z',
+                            collections='naip')
+        searches = search.split(4)
+
+        assert [s._parameters['datetime'] for s in searches] == [
+            '2020-01-01T00:00:00Z/2020-01-01T23:59:59.999999Z',
+            '2020-01-02T00:00:00Z/2020-01-02T23:59:59.999999Z',
+            '2020-01-03T00:00:00Z/2020-01-03T23:59:59.999999Z',
+            '2020-01-04T00:00:00Z/2020-01-05T00:00:00Z',
+        ]
+        assert all(s._parameters['collections'] == ('naip', ) for s in searches)
+        assert search._parameters['datetime'] == '2020-01-01T00:00:00Z/2020-01-05T00:00:00Z'
+
+    def test_split_open_end(self):
+        search = ItemSearch(url=SEARCH_URL, datetime='2020-01-01T00:00:00Z/..')
+        searches = search.split(2)
+
+        assert len(searches) == 2
+        assert searches[0]._parameters['datetime'].startswith('2020-01-01T00:00:00Z/')
+        assert searches[1]._parameters['datetime'].endswith('/..')
+
+    def test_split_invalid(self):
+        with pytest.raises(ParametersError):
+            ItemSearch(url=SEARCH_URL).split(2)
+
+        with pytest.raises(ParametersError):
+            ItemSearch(url=SEARCH_URL, datetime='../2020-01-01T00:00:00Z').split(2)
+
+        with pytest.raises(ParametersError):
+            ItemSearch(url=SEARCH_URL, datetime='2020').split(0)
+
+    def test_get_items_parallel(self, requests_mock):
+        def search_response(request, context):
+            start = request.json()['datetime'].split('/')[0]
+            return {
+                'type': 'FeatureCollection',
+                'features': [make_item(start[:10]),
+                             make_item(f'{start[:10]}-2')],
+                'links': []
+            }
+
+        requests_mock.post(SEARCH_URL, json=search_response)
+        search = ItemSearch(url=SEARCH_URL, datetime='2020-01-01T00:00:00Z/2020-01-04T00:00:00Z')
+
+        items = list(search.get_items_parallel(workers=3))
+        assert sorted(item.id for item in items) == [
+            '2020-01-01', '2020-01-01-2', '2020-01-02', '2020-01-02-2', '2020-01-03', '2020-01-03-2'
+        ]
+        assert len(requests_mock.request_history) == 3
+
+    def test_get_items_parallel_max_items(self, requests_mock):
+        # Every sub-range has an endless number of pages, so this only ends if max_items is shared by the searches
+        next_page = {
+            'type': 'FeatureCollection',
+            'features': [make_item('item')],
+            'links': [{
+                'rel': 'next',
+                'href': f'{SEARCH_URL}?page=next'
+            }]
+        }
+        requests_mock.post(SEARCH_URL, json=next_page)
+        requests_mock.get(f'{SEARCH_URL}?page=next', json=next_page)
+        search = ItemSearch(url=SEARCH_URL,
+                            datetime='2020-01-01T00:00:00Z/2020-01-04T00:00:00Z',
+                            max_items=5)
+
+        threads = set(threading.enumerate())
+        items = list(search.get_items_parallel(workers=3))
+        assert len(items) == 5
+        # Let the stopped workers finish their last request before the mock is torn down
+        join_new_threads(threads)
+
+    def test_get_items_parallel_max_items_empty_range(self, requests_mock):
+        # Items reserved by a sub-range that turns out to be empty are left to the others
+        release = threading.Event()
+
+        def search_response(request, context):
+            start = request.json()['datetime'].split('/')[0]
+            features = []
+            if start.startswith('2020-01-01'):
+                release.wait()
+            elif start.startswith('2020-01-02'):
+                features = [make_item('item-1'), make_item('item-2')]
+            return {'type': 'FeatureCollection', 'features': features, 'links': []}
+
+        requests_mock.post(SEARCH_URL, json=search_response)
+        search = ItemSearch(url=SEARCH_URL,
+                            datetime='2020-01-01T00:00:00Z/2020-01-04T00:00:00Z',
+                            max_items=2)
+
+        threads = set(threading.enumerate())
+        items = search.get_items_parallel(workers=3)
+        try:
+            ids = [next(items).id]
+            release.set()
+            ids.extend(item.id for item in items)
+            assert sorted(ids) == ['item-1', 'item-2']
+        finally:
+            release.set()
+            join_new_threads(threads)
+
+    def test_get_items_parallel_close(self, requests_mock):
+        # Only the first sub-range responds until the iterator has been closed
+        release = threading.Event()
+
+        def search_response(request, context):
+            start = request.json()['datetime'].split('/')[0]
+            if not start.startswith('2020-01-01'):
+                release.wait()
+            return {'type': 'FeatureCollection', 'features': [make_item(start[:10])], 'links': []}
+
+        requests_mock.post(SEARCH_URL, json=search_response)
+        search = ItemSearch(url=SEARCH_URL, datetime='2020-01-01T00:00:00Z/2020-01-04T00:00:00Z')
+
+        threads = set(threading.enumerate())
+        items = search.get_items_parallel(workers=3)
+        try:
+            assert next(items).id == '2020-01-01'
+            closer = threading.Thread(target=items.close)
+            closer.start()
+            closer.join(timeout=5)
+            assert not closer.is_alive()
+        finally:
+            release.set()
+            join_new_threads(threads)
+
+    def test_matched_from_results(self, requests_mock):
+        requests_mock.post(SEARCH_URL,
+                           json={
+                               'type': 'FeatureCollection',
+                               'features': [make_item('item-1')],
+                               'links': [],
+                               'numberMatched': 1
+                           })
+        search = ItemSearch(url=SEARCH_URL, collections='naip')
+
+        items = list(search.get_items())
+        assert len(items) == 1
+        assert search.matched() == 1
+        assert len(requests_mock.request_history) == 1
+
+    def test_context_without_matched(self, requests_mock):
+        requests_mock.post(SEARCH_URL,
+                           json={
+                               'type': 'FeatureCollection',
+                               'features': [make_item('item-1')],
+                               'links': [],
+                               'context': {
+                                   'returned': 1,
+                                   'limit': 10
+                               },
+                               'numberMatched': 5
+                           })
+        search = ItemSearch(url=SEARCH_URL, collections='naip')
+
+        assert [item.id for item in search.get_items()] == ['item-1']
+        assert search.matched() == 5
+        assert len(requests_mock.request_history) == 1
+
+    def test_matched_request(self, requests_mock):
+        requests_mock.post(SEARCH_URL,
+                           json={
+                               'type': 'FeatureCollection',
+                               'features': [],
+                               'links': [],
+                               'context': {
+                                   'matched': 10
+                               }
+                           })
+        search = ItemSearch(url=SEARCH_URL, collections='naip')
+
+        assert search.matched() == 10
+        assert search.matched() == 10
+        assert len(requests_mock.request_history) == 1
+        assert requests_mock.request_history[0].json()['limit'] == 1
+
+    def test_get_fallback(self, requests_mock):
+        requests_mock.post(SEARCH_URL, status_code=405, text='Method Not Allowed')
+        requests_mock.get(SEARCH_URL,
+                          json={
+                              'type': 'FeatureCollection',
+                              'features': [make_item('item-1')],
+                              'links': []
+                          })
+        query = {'eo:cloud_cover': {'lt': 10}}
+        filter = {'op': '=', 'args': [{'property': 'collection'}, 'naip']}
+        search = ItemSearch(url=SEARCH_URL,
+                            collections='naip',
+                            intersects=INTERSECTS_EXAMPLE,
+                            query=query,
+                            filter=filter,
+                            sortby='-properties.datetime,+id',
+                            fields=['id', '-geometry'])
+
+        items = list(search.get_items())
+        assert [item.id for item in items] == ['item-1']
+        assert search.method == 'GET'
+
+        history = requests_mock.request_history
+        assert [request.method for request in history] == ['POST', 'GET']
+        params = parse_qs(urlsplit(history[1].url).query)
+        assert params['collections'] == ['naip']
+        assert json.loads(params['intersects'][0]) == INTERSECTS_EXAMPLE
+        assert json.loads(params['query'][0]) == query
+        assert json.loads(params['filter'][0]) == filter
+        assert params['filter-lang'] == ['cql-json']
+        assert params['sortby'] == ['-properties.datetime,+id']
+        assert params['fields'] == ['id,-geometry']
+
+    def test_no_get_fallback_for_other_errors(self, requests_mock):
+        requests_mock.post(SEARCH_URL, status_code=500, text='Internal Server Error')
+        search = ItemSearch(url=SEARCH_URL, collections='naip')
+
+        with pytest.raises(APIError) as excinfo:
+            list(search.get_items())
+        assert excinfo.value.status_code == 500
+        assert search.method == 'POST'
+
+    def test_get_items_as_dicts(self, requests_mock):
+        next_url = f'{SEARCH_URL}?token=page2'
+        requests_mock.post(SEARCH_URL,
+                           json={
+                               'type': 'FeatureCollection',
+                               'features': [make_item('item-1'),
+                                            make_item('item-2')],
+                               'links': [{
+                                   'rel': 'next',
+                                   'href': next_url
+                               }]
+                           })
+        requests_mock.get(next_url,
+                          json={
+                              'type': 'FeatureCollection',
+                              'features': [make_item('item-3'),
+                                           make_item('item-4')],
+                              'links': []
+                          })
+        search = ItemSearch(url=SEARCH_URL, collections='naip', limit=2, max_items=3)
+
+        items = list(search.get_items_as_dicts())
+        assert [item['id'] for item in items] == ['item-1', 'item-2', 'item-3']
+        assert all(isinstance(item, dict) for item in items)
+
+    def test_max_items_on_first_page(self, requests_mock):
+        # The next page is not prefetched once the first one holds max_items
+        next_url = f'{SEARCH_URL}?token=page2'
+        requests_mock.post(SEARCH_URL,
+                           json={
+                               'type': 'FeatureCollection',
+                               'features': [make_item(f'item-{i}') for i in range(10)],
+                               'links': [{
+                                   'rel': 'next',
+                                   'href': next_url
+                               }]
+                           })
+        requests_mock.get(next_url, json={'type': 'FeatureCollection', 'features': [], 'links': []})
+        search = ItemSearch(url=SEARCH_URL, collections='naip', limit=10, max_items=10)
+
+        threads = set(threading.enumerate())
+        items = list(search.get_items())
+        join_new_threads(threads)
+
+        assert len(items) == 10
+        assert len(requests_mock.request_history) == 1
+
+    @pytest.mark.parametrize("prefetch, num_requests", [(0, 1), (1, 2), (2, 3)])
+    def test_prefetch(self, requests_mock, prefetch, num_requests):
+        next_page = {
+            'type': 'FeatureCollection',
+            'features': [make_item('item')],
+            'links': [{
+                'rel': 'next',
+                'href': f'{SEARCH_URL}?page=next'
+            }]
+        }
+        requests_mock.post(SEARCH_URL, json=next_page)
+        requests_mock.get(f'{SEARCH_URL}?page=next', json=next_page)
+        search = ItemSearch(url=SEARCH_URL, collections='naip', prefetch=prefetch)
+
+        threads = set(threading.enumerate())
+        items = search.get_items()
+        next(items)
+        # wait for the producer to request the pages ahead before stopping it
+        deadline = time.monotonic() + 5
+        while len(requests_mock.request_history) < num_requests and time.monotonic() < deadline:
+            time.sleep(0.01)
+        items.close()
+        join_new_threads(threads)
+
+        assert len(requests_mock.request_history) == num_requests
+
 
 class TestItemSearchQuery:
     @pytest.mark.vcr
@@ -1,11 +1,18 @@
+import io
+import threading
 from urllib.parse import parse_qs, urlsplit
 
 import pytest
+from requests import Session
+from urllib3 import HTTPResponse
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.util.retry import Retry
 from pystac_client.conformance import ConformanceClasses
 
+from pystac_client import stac_api_io as stac_api_io_module
 from pystac_client.exceptions import APIError
 from pystac_client.stac_api_io import StacApiIO
-from .helpers import STAC_URLS
+from .helpers import STAC_URLS, join_new_threads
 
 
 class TestSTAC_IOOverride:
@@ -62,6 +69,208 @@ class TestSTAC_IOOverride:
         # Check that this does not raise an exception
         assert conformant_io.conforms_to(ConformanceClasses.CORE)
 
+    def test_get_pages_prefetch_error(self, requests_mock):
+        """Checks that errors from prefetched requests are raised when that page is reached."""
+        url = "https://some-url.com/search"
+        first_page = {"features": [], "links": [{"rel": "next", "href": f"{url}?page=2"}]}
+        requests_mock.get(url, [{"json": first_page}, {"status_code": 500, "text": "Error"}])
+
+        pages = StacApiIO().get_pages(url, prefetch=2)
+        assert next(pages) == first_page
+        with pytest.raises(APIError) as excinfo:
+            next(pages)
+        assert excinfo.value.status_code == 500
+
+    def test_get_pages_prefetch_close(self, requests_mock):
+        """Checks that at most ``prefetch`` pages are requested ahead, and none once the consumer stops iterating."""
+        url = "https://some-url.com/search"
+        prefetched = threading.Event()
+
+        def next_page(request, context):
+            # the first page has been yielded and the next 2 requested, so the producer waits for room now
+            if len(requests_mock.request_history) == 3:
+                prefetched.set()
+            return {"features": [], "links": [{"rel": "next", "href": url}]}
+
+        requests_mock.get(url, json=next_page)
+
+        threads = set(threading.enumerate())
+        pages = StacApiIO().get_pages(url, prefetch=2)
+        next(pages)
+        assert prefetched.wait(timeout=5)
+        pages.close()
+        join_new_threads(threads)
+
+        assert len(requests_mock.request_history) == 3
+
+    @pytest.mark.parametrize("prefetch", [0, 2])
+    def test_get_pages_max_items(self, requests_mock, prefetch):
+        """Checks that no more pages are requested once they contain ``max_items`` features."""
+        url = "https://some-url.com/search"
+        page = {"features": [{"id": "1"}, {"id": "2"}], "links": [{"rel": "next", "href": url}]}
+        requests_mock.get(url, json=page)
+
+        threads = set(threading.enumerate())
+        result = list(StacApiIO().get_pages(url, prefetch=prefetch, max_items=3))
+        join_new_threads(threads)
+
+        assert result == [page, page]
+        assert len(requests_mock.request_history) == 2
+
+    def test_get_pages_post_link(self, requests_mock):
+        """Checks that "next" links with a POST method and merged body are followed."""
+        url = "https://some-url.com/search"
+        first_page = {
+            "features": [],
+            "links": [{
+                "rel": "next",
+                "href": url,
+                "method": "POST",
+                "body": {
+                    "token": "page2"
+                },
+                "merge": True
+            }]
+        }
+        second_page = {"features": [], "links": []}
+        requests_mock.post(url, [{"json": first_page}, {"json": second_page}])
+
+        result = list(StacApiIO().get_pages(url, method="POST", parameters={"limit": 10}))
+
+        assert result == [first_page, second_page]
+        history = requests_mock.request_history
+        assert history[0].json() == {"limit": 10}
+        assert history[1].json() == {"limit": 10, "token": "page2"}
+
+    @pytest.fixture
+    def responses(self, monkeypatch):
+        """Answers the requests sent by urllib3 with the queued status codes in turn, followed by 200 responses,
+        without opening any connections."""
+        monkeypatch.setattr(Retry, "get_backoff_time", lambda self: 0)
+        statuses = []
+        methods = []
+
+        def make_request(pool, conn, method, url, **kwargs):
+            methods.append(method)
+            return HTTPResponse(body=io.BytesIO(b"{}"),
+                                status=statuses.pop(0) if statuses else 200,
+                                headers={"Content-Type": "application/json"},
+                                request_method=method,
+                                request_url=url,
+                                preload_content=False)
+
+        monkeypatch.setattr(HTTPConnectionPool, "_make_request", make_request)
+        return statuses, methods
+
+    @pytest.mark.parametrize("method", ["GET", "POST"])
+    def test_retry(self, responses, method):
+        statuses, methods = responses
+        statuses.extend([503, 502])
+
+        assert StacApiIO().request("http://some-url.com/search", method=method) == "{}"
+        assert methods == [method] * 3
+
+    def test_retry_exhausted(self, responses):
+        statuses, methods = responses
+        statuses.extend([503] * 4)
+
+        with pytest.raises(APIError) as excinfo:
+            StacApiIO().request("http://some-url.com/search", method="POST")
+        assert excinfo.value.status_code == 503
+        assert len(methods) == 4
+
+    def test_connection_pool(self):
+        adapter = StacApiIO(pool_maxsize=4).session.get_adapter("http://some-url.com")
+        assert adapter.poolmanager.connection_pool_kw["maxsize"] == 4
+
+    def test_shared_session(self, requests_mock):
+        """Checks that instances share connection pools by default without sharing Session state."""
+        url = "https://some-url.com/some-file.json"
+        custom_io = StacApiIO(headers={"x-my-header": "Some Value"},
+                              parameters={"my-param": "something"})
+        default_io = StacApiIO()
+        assert custom_io.session is not default_io.session
+        assert custom_io.session.get_adapter(url) is default_io.session.get_adapter(url)
+
+        custom_io.session.headers["Authorization"] = "Bearer secret"
+        requests_mock.get(url, status_code=200, json={})
+        default_io.read_json(url)
+
+        history = requests_mock.request_history
+        assert "x-my-header" not in history[0].headers
+        assert "Authorization" not in history[0].headers
+        assert "my-param" not in history[0].qs
+
+        session = Session()
+        assert StacApiIO(session=session).session is session
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_post_body(self, requests_mock, monkeypatch, use_orjson):
+        """Checks that POST parameters are sent as a JSON body."""
+        if not use_orjson:
+            monkeypatch.setattr(stac_api_io_module, "orjson", None)
+        url = "https://some-url.com/search"
+        parameters = {"collections": ("naip", ), "limit": 10}
+        requests_mock.post(url, status_code=200, json={})
+
+        StacApiIO().read_json(url, method="POST", parameters=parameters)
+
+        history = requests_mock.request_history
+        assert history[0].headers["Content-Type"] == "application/json"
+        assert history[0].json() == {"collections": ["naip"], "limit": 10}
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_post_body_float_subclass(self, requests_mock, monkeypatch, use_orjson):
+        """Checks that float subclasses (e.g. numpy.float64) in POST parameters are serialized."""
+        if not use_orjson:
+            monkeypatch.setattr(stac_api_io_module, "orjson", None)
+
+        class Float(float):
+            pass
+
+        url = "https://some-url.com/search"
+        requests_mock.post(url, status_code=200, json={})
+
+        StacApiIO().read_json(url,
+                              method="POST",
+                              parameters={"query": {
+                                  "eo:cloud_cover": {
+                                      "lt": Float(10.5)
+                                  }
+                              }})
+
+        assert requests_mock.request_history[0].json() == {
+            "query": {
+                "eo:cloud_cover": {
+                    "lt": 10.5
+                }
+            }
+        }
+
+    def test_post_body_error(self, requests_mock):
+        """Checks that parameters which cannot be serialized raise an APIError."""
+        url = "https://some-url.com/search"
+        requests_mock.post(url, status_code=200, json={})
+
+        with pytest.raises(APIError):
+            StacApiIO().read_json(url, method="POST", parameters={"query": object()})
+        assert len(requests_mock.request_history) == 0
+
+    def test_cache(self, requests_mock, monkeypatch, tmp_path):
+        """Checks that repeated requests are served from the cache."""
+        requests_cache = pytest.importorskip("requests_cache")
+        monkeypatch.chdir(tmp_path)
+        url = "https://some-url.com/search"
+        requests_mock.post(url, status_code=200, json={"features": []})
+        stac_api_io = StacApiIO(cache=True)
+        assert isinstance(stac_api_io.session, requests_cache.CachedSession)
+
+        for _ in range(2):
+            response = stac_api_io.read_json(url, method="POST", parameters={"limit": 1})
+            assert response == {"features": []}
+
+        assert len(requests_mock.request_history) == 1
+
     def test_custom_headers(self, requests_mock):
         """Checks that headers passed to the init method are added to requests."""
         header_name = "x-my-header"
@@ -106,3 +315,24 @@ class TestSTAC_IOOverride:
         assert request_qp_name in actual_qp
         assert len(actual_qp[request_qp_name]) == 1
         assert actual_qp[request_qp_name][0] == request_qp_value
+
+    @pytest.mark.parametrize("prefetch", [0, 1, 2])
+    def test_get_pages(self, requests_mock, prefetch):
+        """Checks that all pages are yielded in order, following "next" links."""
+        url = "https://some-url.com/search"
+        pages = [{
+            "features": [{
+                "id": str(i)
+            }],
+            "links": [{
+                "rel": "next",
+                "href": f"{url}?page={i + 1}"
+            }] if i < 2 else []
+        } for i in range(3)]
+        requests_mock.get(url, [{"json": page} for page in pages])
+        stac_api_io = StacApiIO()
+
+        result = list(stac_api_io.get_pages(url, prefetch=prefetch))
+
+        assert result == pages
+        assert len(requests_mock.request_history) == 3